@@ -15,7 +15,11 @@ SPDX-License-Identifier: Apache-2.0
 import unittest
 
 import pytest
+from uprotocol.communication.ustatuserror import UStatusError
 from uprotocol.uri.serializer.uriserializer import UriSerializer
+from uprotocol.v1.uattributes_pb2 import UAttributes, UMessageType, UPriority
+from uprotocol.v1.ucode_pb2 import UCode
+from zenoh import Priority, ZBytes
 
 from up_transport_zenoh.zenohutils import MessageFlag, ZenohUtils
 
@@ -48,6 +52,14 @@ class TestZenohUtils(unittest.IsolatedAsyncioTestCase):
                 print("result2 ", result_key2)
                 assert result_key2 == expected_zenoh_key
 
+    @pytest.mark.asyncio
+    async def test_src_only_and_src_sink_key(self):
+        authority = "192.168.1.100"
+        src = UriSerializer().deserialize("/10AB/3/80CD")
+        sink = UriSerializer().deserialize("//my-host2/20EF/4/B")
+        assert ZenohUtils.src_only_key(authority, src) == "up/192.168.1.100/10AB/3/80CD/{}/{}/{}/{}"
+        assert ZenohUtils.src_sink_key(authority, src, sink) == "up/192.168.1.100/10AB/3/80CD/my-host2/20EF/4/B"
+
     @pytest.mark.asyncio
     async def test_get_listener_message_type(self):
         test_cases = [
@@ -70,6 +82,94 @@ class TestZenohUtils(unittest.IsolatedAsyncioTestCase):
             else:
                 assert ZenohUtils.get_listener_message_type(src, None) == expected_result
 
+    @pytest.mark.asyncio
+    async def test_get_listener_message_types_batch(self):
+        sources = [
+            UriSerializer().deserialize("//192.168.1.100/10AB/3/80CD"),
+            UriSerializer().deserialize("//192.168.1.100/10AB/3/0"),
+            UriSerializer().deserialize("//*/FFFF/FF/FFFF"),
+        ]
+        sinks = [
+            None,
+            UriSerializer().deserialize("//192.168.1.101/20EF/4/B"),
+            UriSerializer().deserialize("//192.168.1.100/10AB/3/0"),
+        ]
+        assert ZenohUtils.get_listener_message_types_batch(sources, sinks) == [
+            MessageFlag.PUBLISH,
+            MessageFlag.REQUEST,
+            MessageFlag.NOTIFICATION | MessageFlag.RESPONSE,
+        ]
+
+        with pytest.raises(UStatusError):
+            ZenohUtils.get_listener_message_types_batch(sources, sinks[:2])
+        with pytest.raises(UStatusError) as exc_info:
+            ZenohUtils.get_listener_message_types_batch(sources[:2], [None, None])
+        assert exc_info.value.get_message().endswith("at index 1")
+
+    @pytest.mark.asyncio
+    async def test_map_zenoh_priority(self):
+        test_cases = [
+            (UPriority.UPRIORITY_UNSPECIFIED, Priority.DATA_LOW),
+            (UPriority.UPRIORITY_CS0, Priority.BACKGROUND),
+            (UPriority.UPRIORITY_CS1, Priority.DATA_LOW),
+            (UPriority.UPRIORITY_CS2, Priority.DATA),
+            (UPriority.UPRIORITY_CS3, Priority.DATA_HIGH),
+            (UPriority.UPRIORITY_CS4, Priority.INTERACTIVE_LOW),
+            (UPriority.UPRIORITY_CS5, Priority.INTERACTIVE_HIGH),
+            (UPriority.UPRIORITY_CS6, Priority.REAL_TIME),
+        ]
+        for upriority, expected_priority in test_cases:
+            assert ZenohUtils.map_zenoh_priority(upriority) == expected_priority
+
+    @pytest.mark.asyncio
+    async def test_uattributes_to_attachment(self):
+        attributes = UAttributes(
+            type=UMessageType.UMESSAGE_TYPE_PUBLISH,
+            source=UriSerializer().deserialize("//192.168.1.100/10AB/3/80CD"),
+            priority=UPriority.UPRIORITY_CS1,
+        )
+        assert ZenohUtils.uattributes_to_attachment(attributes) == [b"\x01", attributes.SerializeToString()]
+
+    @pytest.mark.asyncio
+    async def test_attachment_to_uattributes_inplace(self):
+        first = UAttributes(
+            type=UMessageType.UMESSAGE_TYPE_PUBLISH,
+            source=UriSerializer().deserialize("//192.168.1.100/10AB/3/80CD"),
+            priority=UPriority.UPRIORITY_CS1,
+        )
+        second = UAttributes(
+            type=UMessageType.UMESSAGE_TYPE_NOTIFICATION,
+            source=UriSerializer().deserialize("//192.168.1.100/10AB/3/80CD"),
+            sink=UriSerializer().deserialize("//192.168.1.101/20EF/4/0"),
+            priority=UPriority.UPRIORITY_CS2,
+        )
+
+        result1 = ZenohUtils.attachment_to_uattributes_inplace(ZBytes(ZenohUtils.uattributes_to_attachment(first)))
+        assert result1 == first
+
+        result2 = ZenohUtils.attachment_to_uattributes_inplace(ZBytes(ZenohUtils.uattributes_to_attachment(second)))
+        assert result2 is result1
+        assert result2 == second
+        assert result1 != first
+
+    @pytest.mark.asyncio
+    async def test_attachment_to_uattributes_errors(self):
+        attributes_bytes = UAttributes(
+            type=UMessageType.UMESSAGE_TYPE_PUBLISH,
+            source=UriSerializer().deserialize("//192.168.1.100/10AB/3/80CD"),
+        ).SerializeToString()
+        test_cases = [
+            ([b"\x02", attributes_bytes], "UAttributes version is 2 (should be 1)"),
+            ([b"\x01"], "Unable to get the UAttributes"),
+            ([b"\x01", b""], "Unable to get the UAttributes"),
+            ([b"\x01", b"\xff"], "Failed to convert Attachment to UAttributes"),
+        ]
+        for attachment, expected_message in test_cases:
+            with pytest.raises(UStatusError) as exc_info:
+                ZenohUtils.attachment_to_uattributes(ZBytes(attachment))
+            assert exc_info.value.get_code() == UCode.INVALID_ARGUMENT
+            assert exc_info.value.get_message().startswith(expected_message)
+
 
 if __name__ == "__main__":
     unittest.main()
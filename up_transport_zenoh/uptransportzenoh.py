@@ -34,8 +34,7 @@ from zenoh.zenoh import KeyExpr
 
 from up_transport_zenoh.zenohutils import MessageFlag, ZenohUtils
 
-# Configure the logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
 
 
 class UPTransportZenoh(UTransport):
@@ -63,7 +62,7 @@ class UPTransportZenoh(UTransport):
             session = zenoh.open(config)
         except Exception:
             msg = "Unable to open Zenoh session"
-            logging.error(msg)
+            logger.error(msg)
             raise UStatus.fail_with_code(UCode.INTERNAL, msg)
 
         return cls(
@@ -76,30 +75,30 @@ class UPTransportZenoh(UTransport):
         attachment = ZenohUtils.uattributes_to_attachment(attributes)
         if not attachment:
             msg = "Unable to transform UAttributes to attachment"
-            logging.debug(f"ERROR: {msg}")
+            logger.debug("ERROR: %s", msg)
             return UStatus(code=UCode.INVALID_ARGUMENT, message=msg)
 
         # Map the priority to Zenoh
         priority = ZenohUtils.map_zenoh_priority(attributes.priority)
         if not priority:
             msg = "Unable to map to Zenoh priority"
-            logging.debug(f"ERROR: {msg}")
+            logger.debug("ERROR: %s", msg)
             return UStatus(code=UCode.INVALID_ARGUMENT, message=msg)
 
         try:
             # Simulate sending data
-            logging.debug(f"Sending data to Zenoh with key: {zenoh_key}")
-            logging.debug(f"Data: {payload}")
-            logging.debug(f"Priority: {priority}")
-            logging.debug(f"Attachment: {attachment}")
+            logger.debug("Sending data to Zenoh with key: %s", zenoh_key)
+            logger.debug("Data: %s", payload)
+            logger.debug("Priority: %s", priority)
+            logger.debug("Attachment: %s", attachment)
 
             self.session.put(key_expr=zenoh_key, payload=payload, attachment=attachment, priority=priority)
             msg = "Successfully sent data to Zenoh"
-            logging.debug(f"SUCCESS:{msg}")
+            logger.debug("SUCCESS:%s", msg)
             return UStatus(code=UCode.OK, message=msg)
         except Exception as e:
             msg = f"Unable to send with Zenoh: {e}"
-            logging.debug(f"ERROR: {msg}")
+            logger.debug("ERROR: %s", msg)
             return UStatus(code=UCode.INTERNAL, message=msg)
 
     def send_request(self, zenoh_key: str, payload: bytes, attributes: UAttributes) -> UStatus:
@@ -107,7 +106,7 @@ class UPTransportZenoh(UTransport):
         attachment = ZenohUtils.uattributes_to_attachment(attributes)
         if attachment is None:
             msg = "Unable to transform UAttributes to attachment"
-            logging.debug(msg)
+            logger.debug(msg)
             return UStatus(code=UCode.INVALID_ARGUMENT, message=msg)
         resp_callback = None
         for saved_zenoh_key, listener in self.rpc_callback_map.items():
@@ -119,7 +118,7 @@ class UPTransportZenoh(UTransport):
                 break
         if resp_callback is None:
             msg = "Unable to get callback"
-            logging.debug(msg)
+            logger.debug(msg)
             return UStatus(code=UCode.INTERNAL, message=msg)
 
         def handle_response(reply: Query.reply) -> None:
@@ -129,20 +128,20 @@ class UPTransportZenoh(UTransport):
                 attachment = sample.attachment
                 if attachment is None:
                     msg = "Unable to get the attachment"
-                    logging.debug(msg)
+                    logger.debug(msg)
                     return UStatus(code=UCode.INTERNAL, message=msg)
 
                 u_attribute = ZenohUtils.attachment_to_uattributes(attachment)
                 if u_attribute is None:
                     msg = "Transform attachment to UAttributes failed"
-                    logging.debug(msg)
+                    logger.debug(msg)
                     return UStatus(code=UCode.INTERNAL, message=msg)
                 # Create UMessage
                 msg = UMessage(attributes=u_attribute, payload=bytes(sample.payload))
                 asyncio.run(resp_callback.on_receive(msg))
             except Exception:
                 msg = f"Error while parsing Zenoh reply: {reply.error}"
-                logging.debug(msg)
+                logger.debug(msg)
                 return UStatus(code=UCode.INTERNAL, message=msg)
 
         # Send query
@@ -171,7 +170,7 @@ class UPTransportZenoh(UTransport):
         thread.start()
 
         msg = "Successfully sent rpc request to Zenoh"
-        logging.debug(f"SUCCESS:{msg}")
+        logger.debug("SUCCESS:%s", msg)
         return UStatus(code=UCode.OK, message=msg)
 
     def send_response(self, payload: bytes, attributes: UAttributes) -> UStatus:
@@ -179,7 +178,7 @@ class UPTransportZenoh(UTransport):
         attachment = ZenohUtils.uattributes_to_attachment(attributes)
         if attachment is None:
             msg = "Unable to transform UAttributes to attachment"
-            logging.debug(msg)
+            logger.debug(msg)
             return UStatus(code=UCode.INVALID_ARGUMENT, message=msg)
 
         # Find out the corresponding query from dictionary
@@ -188,18 +187,18 @@ class UPTransportZenoh(UTransport):
         query = self.query_map.pop(reqid.SerializeToString(), None)
         if not query:
             msg = "Query doesn't exist"
-            logging.debug(msg)
+            logger.debug(msg)
             return UStatus(code=UCode.INTERNAL, message=msg)  # Send back the query
 
         try:
             query.reply(query.key_expr, payload, attachment=attachment)
             msg = "Successfully sent rpc response to Zenoh"
-            logging.debug(f"SUCCESS:{msg}")
+            logger.debug("SUCCESS:%s", msg)
             return UStatus(code=UCode.OK, message=msg)
 
         except Exception as e:
             msg = "Unable to reply with Zenoh: {}".format(str(e))
-            logging.debug(msg)
+            logger.debug(msg)
             return UStatus(code=UCode.INTERNAL, message=msg)
 
     def register_publish_notification_listener(self, zenoh_key: str, listener: UListener) -> UStatus:
@@ -208,16 +207,16 @@ class UPTransportZenoh(UTransport):
             attachment = sample.attachment
             if attachment is None:
                 msg = "Unable to get attachment"
-                logging.debug(msg)
+                logger.debug(msg)
                 return UStatus(code=UCode.INTERNAL, message=msg)
             try:
                 u_attribute = ZenohUtils.attachment_to_uattributes(attachment)
             except UStatusError as error:
-                logging.debug(error.get_message())
+                logger.debug(error.get_message())
                 return UStatus(code=error.get_code(), message=error.get_message())
             if u_attribute is None:
                 msg = "Unable to decode attributes"
-                logging.debug(msg)
+                logger.debug(msg)
                 return UStatus(code=UCode.INTERNAL, message=msg)
             message = UMessage(attributes=u_attribute, payload=bytes(sample.payload))
             asyncio.run(listener.on_receive(message))
@@ -230,11 +229,11 @@ class UPTransportZenoh(UTransport):
                     self.subscriber_map[(zenoh_key, listener)] = subscriber
         except Exception:
             msg = "Unable to register callback with Zenoh"
-            logging.debug(msg)
+            logger.debug(msg)
             raise UStatus.fail_with_code(UCode.INTERNAL, msg)
 
         msg = "Successfully register callback with Zenoh"
-        logging.debug(msg)
+        logger.debug(msg)
         return UStatus(code=UCode.OK, message=msg)
 
     def register_request_listener(self, zenoh_key: str, listener: UListener) -> UStatus:
@@ -243,17 +242,17 @@ class UPTransportZenoh(UTransport):
             attachment = query.attachment
             if not attachment:
                 msg = "Unable to get attachment"
-                logging.debug(msg)
+                logger.debug(msg)
                 return UStatus(code=UCode.INTERNAL, message=msg)
 
             try:
                 u_attribute = ZenohUtils.attachment_to_uattributes(attachment)
             except UStatusError as error:
-                logging.debug(error.get_message())
+                logger.debug(error.get_message())
                 return UStatus(code=error.get_code(), message=error.get_message())
             if u_attribute is None:
                 msg = "Unable to decode attributes"
-                logging.debug(msg)
+                logger.debug(msg)
                 return UStatus(code=UCode.INTERNAL, message=msg)
 
             message = UMessage(attributes=u_attribute, payload=bytes(query.payload) if query.payload else None)
@@ -267,7 +266,7 @@ class UPTransportZenoh(UTransport):
 
         except Exception:
             msg = "Unable to register callback with Zenoh"
-            logging.debug(msg)
+            logger.debug(msg)
             return UStatus(code=UCode.INTERNAL, message=msg)
 
         return UStatus(code=UCode.OK, message="Successfully register callback with Zenoh")
@@ -281,21 +280,24 @@ class UPTransportZenoh(UTransport):
         attributes = message.attributes
         source = attributes.source
         sink = attributes.sink
-        zenoh_key = ZenohUtils.to_zenoh_key_string(self.authority_name, source, sink)
-        if not source:
+        # A sub-message is always truthy, so check its presence bit instead
+        if not attributes.HasField("source"):
             return UStatus(code=UCode.INVALID_ARGUMENT, message="attributes.source shouldn't be empty")
         payload = message.payload or b''
         # Check the type of UAttributes (Publish / Notification / Request / Response)
         msg_type = attributes.type
         if msg_type == UMessageType.UMESSAGE_TYPE_PUBLISH:
             Validators.PUBLISH.validator().validate(attributes)
+            zenoh_key = ZenohUtils.to_zenoh_key_string(self.authority_name, source, sink)
             return self.send_publish_notification(zenoh_key, payload, attributes)
         elif msg_type == UMessageType.UMESSAGE_TYPE_NOTIFICATION:
             Validators.NOTIFICATION.validator().validate(attributes)
+            zenoh_key = ZenohUtils.to_zenoh_key_string(self.authority_name, source, sink)
             return self.send_publish_notification(zenoh_key, payload, attributes)
 
         elif msg_type == UMessageType.UMESSAGE_TYPE_REQUEST:
             Validators.REQUEST.validator().validate(attributes)
+            zenoh_key = ZenohUtils.to_zenoh_key_string(self.authority_name, source, sink)
             return self.send_request(zenoh_key, payload, attributes)
 
         elif msg_type == UMessageType.UMESSAGE_TYPE_RESPONSE:
@@ -313,12 +315,12 @@ class UPTransportZenoh(UTransport):
         # RPC request
         if flag & MessageFlag.REQUEST:
             # Get Zenoh key
-            zenoh_key = ZenohUtils.to_zenoh_key_string(self.authority_name, source_filter, sink_filter)
+            zenoh_key = ZenohUtils.src_sink_key(self.authority_name, source_filter, sink_filter)
             return self.register_request_listener(zenoh_key, listener)  # RPC response
         if flag & MessageFlag.RESPONSE:
             if sink_filter is not None:
                 # Get Zenoh key
-                zenoh_key = ZenohUtils.to_zenoh_key_string(self.authority_name, sink_filter, source_filter)
+                zenoh_key = ZenohUtils.src_sink_key(self.authority_name, sink_filter, source_filter)
                 return self.register_response_listener(zenoh_key, listener)
             else:
                 return UStatus(code=UCode.INVALID_ARGUMENT, message="Sink should not be None in Response")
@@ -340,12 +342,12 @@ class UPTransportZenoh(UTransport):
         # RPC request
         if flag & MessageFlag.REQUEST:
             # Get Zenoh key
-            zenoh_key = ZenohUtils.to_zenoh_key_string(self.authority_name, source_filter, sink_filter)
+            zenoh_key = ZenohUtils.src_sink_key(self.authority_name, source_filter, sink_filter)
             return self._remove_request_listener(zenoh_key, listener)  # RPC response
         if flag & MessageFlag.RESPONSE:
             if sink_filter is not None:
                 # Get Zenoh key
-                zenoh_key = ZenohUtils.to_zenoh_key_string(self.authority_name, sink_filter, source_filter)
+                zenoh_key = ZenohUtils.src_sink_key(self.authority_name, sink_filter, source_filter)
                 return self._remove_response_listener(zenoh_key)
             else:
                 return UStatus(code=UCode.INVALID_ARGUMENT, message="Sink should not be None in Response")
@@ -354,7 +356,7 @@ class UPTransportZenoh(UTransport):
         with self.rpc_callback_lock:
             if self.rpc_callback_map.pop(zenoh_key, None) is None:
                 msg = f"RPC response callback doesn't exist for : {zenoh_key}"
-                logging.error(msg)
+                logger.error(msg)
                 return UStatus(code=UCode.NOT_FOUND, message=msg)
         return UStatus(code=UCode.OK)
 
@@ -362,7 +364,7 @@ class UPTransportZenoh(UTransport):
         with self.subscriber_lock:
             if self.subscriber_map.pop((zenoh_key, listener), None) is None:
                 msg = f"Listener not registered for : {zenoh_key}"
-                logging.error(msg)
+                logger.error(msg)
                 return UStatus(code=UCode.NOT_FOUND, message=msg)
 
         return UStatus(code=UCode.OK, message="Listener removed successfully")
@@ -371,6 +373,6 @@ class UPTransportZenoh(UTransport):
         with self.queryable_lock:
             if self.queryable_map.pop((zenoh_key, listener), None) is None:
                 msg = f"RPC request listener doesn't exist for : {zenoh_key}"
-                logging.error(msg)
+                logger.error(msg)
                 return UStatus(code=UCode.NOT_FOUND, message=msg)
         return UStatus(code=UCode.OK, message="Listener removed successfully")
@@ -13,9 +13,11 @@ SPDX-License-Identifier: Apache-2.0
 """
 
 import logging
-from enum import IntFlag
-from typing import Union
+import threading
+from functools import lru_cache
+from typing import List, Optional, Sequence, Union
 
+from google.protobuf.message import DecodeError
 from uprotocol.communication.ustatuserror import UStatusError
 from uprotocol.uri.factory.uri_factory import UriFactory
 from uprotocol.v1.uattributes_pb2 import (
@@ -28,118 +30,240 @@ from uprotocol.v1.ustatus_pb2 import UStatus
 from zenoh import Priority, ZBytes
 
 UATTRIBUTE_VERSION: int = 1
+# The version number as bytes (assuming 1 as in the Rust example)
+_UATTRIBUTE_VERSION_BYTES = UATTRIBUTE_VERSION.to_bytes(1, byteorder='little')
+
+_PRIORITY_UNSPEC = Priority.DATA_LOW
+# Zenoh priorities indexed by the raw UPriority value
+_PRIORITY_TABLE = (
+    _PRIORITY_UNSPEC,
+    Priority.BACKGROUND,
+    Priority.DATA_LOW,
+    Priority.DATA,
+    Priority.DATA_HIGH,
+    Priority.INTERACTIVE_LOW,
+    Priority.INTERACTIVE_HIGH,
+    Priority.REAL_TIME,
+)
+assert UPriority.UPRIORITY_UNSPECIFIED == 0 and UPriority.UPRIORITY_CS6 == len(_PRIORITY_TABLE) - 1
+
+logger = logging.getLogger(__name__)
+
+# Per-thread UAttributes reused by ZenohUtils.attachment_to_uattributes_inplace
+_TLS = threading.local()
 
-# Configure the logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+# Wildcard values as module globals, avoiding an attribute lookup on UriFactory per comparison
+_WILDCARD_ENTITY_ID = UriFactory.WILDCARD_ENTITY_ID
+_WILDCARD_ENTITY_VERSION = UriFactory.WILDCARD_ENTITY_VERSION
+_WILDCARD_RESOURCE_ID = UriFactory.WILDCARD_RESOURCE_ID
 
 
-class MessageFlag(IntFlag):
+class MessageFlag:
+    # Plain int bit flags rather than an IntFlag, so combining them is a C-level integer OR
     PUBLISH = 1
     NOTIFICATION = 2
     REQUEST = 4
     RESPONSE = 8
 
 
+# Buckets a resource ID falls into for the message type classification
+_BKT_ZERO, _BKT_RPC, _BKT_NONRPC, _BKT_WILD, _BKT_OTHER = 0, 1, 2, 3, 4
+
+# Half-open [LO, HI) resource ID ranges
+_RPC_LO, _RPC_HI = 1, 0x7FFF
+_NONRPC_LO, _NONRPC_HI = 0x8000, 0xFFFE
+
+
+def _classify(resource_id: int) -> int:
+    if resource_id == 0:
+        return _BKT_ZERO
+    elif resource_id == _WILDCARD_RESOURCE_ID:
+        return _BKT_WILD
+    elif _RPC_LO <= resource_id < _RPC_HI:
+        return _BKT_RPC
+    elif _NONRPC_LO <= resource_id < _NONRPC_HI:
+        return _BKT_NONRPC
+    return _BKT_OTHER
+
+
+def _message_flag(src_bucket: int, dst_bucket: Optional[int]) -> int:
+    flag = 0
+
+    # Publish
+    if dst_bucket is None:
+        if src_bucket in (_BKT_NONRPC, _BKT_WILD):
+            flag |= MessageFlag.PUBLISH
+        return flag
+
+    # Notification / Request / Response
+    if src_bucket in (_BKT_NONRPC, _BKT_WILD) and dst_bucket in (_BKT_ZERO, _BKT_WILD):
+        flag |= MessageFlag.NOTIFICATION
+    if src_bucket in (_BKT_ZERO, _BKT_WILD) and dst_bucket in (_BKT_RPC, _BKT_WILD):
+        flag |= MessageFlag.REQUEST
+    if src_bucket in (_BKT_RPC, _BKT_WILD) and dst_bucket in (_BKT_ZERO, _BKT_WILD):
+        flag |= MessageFlag.RESPONSE
+    if src_bucket in (_BKT_NONRPC, _BKT_WILD) and dst_bucket == _BKT_WILD:
+        flag |= MessageFlag.PUBLISH
+    return flag
+
+
+# MessageFlag bits for every (source bucket, sink bucket) pair, sink bucket is None when there is no sink UUri
+_BUCKETS = (_BKT_ZERO, _BKT_RPC, _BKT_NONRPC, _BKT_WILD, _BKT_OTHER)
+_FLAG_TABLE = {
+    (src_bucket, dst_bucket): flag
+    for src_bucket in _BUCKETS
+    for dst_bucket in _BUCKETS + (None,)
+    if (flag := _message_flag(src_bucket, dst_bucket))
+}
+
+
+def _lookup_flag(source_uuri: UUri, sink_uuri: Optional[UUri]) -> int:
+    src_bucket = _classify(source_uuri.resource_id)
+    dst_bucket = None if sink_uuri is None else _classify(sink_uuri.resource_id)
+    return _FLAG_TABLE.get((src_bucket, dst_bucket), 0)
+
+
+# Uppercase hex strings of the single byte major versions
+_HEX_VER = tuple("%X" % i for i in range(256))
+
+
+@lru_cache(maxsize=4096)
+def _uri_to_zenoh_key_cached(authority: str, ue_id: int, ue_version_major: int, resource_id: int) -> str:
+    # Keyed on the plain UUri fields, since protobuf messages are mutable and unhashable
+    ue_id_str = "*" if ue_id == _WILDCARD_ENTITY_ID else "%X" % ue_id
+    if ue_version_major == _WILDCARD_ENTITY_VERSION:
+        ue_version_major_str = "*"
+    elif 0 <= ue_version_major < len(_HEX_VER):
+        ue_version_major_str = _HEX_VER[ue_version_major]
+    else:
+        ue_version_major_str = "%X" % ue_version_major
+    resource_id_str = "*" if resource_id == _WILDCARD_RESOURCE_ID else "%X" % resource_id
+    return f"{authority}/{ue_id_str}/{ue_version_major_str}/{resource_id_str}"
+
+
+def _parse_attachment(attachment: ZBytes, uattributes: UAttributes) -> UAttributes:
+    try:
+        # Convert ZBytes to a list of bytes
+        attachment_bytes = attachment.deserialize(list)
+    except Exception as e:
+        msg = f"Failed to convert Attachment to UAttributes: {e}"
+        logger.debug(msg)
+        raise UStatusError.from_code_message(code=UCode.INVALID_ARGUMENT, message=msg)
+
+    # Ensure there is at least one byte for the version
+    if len(attachment_bytes) < 1:
+        msg = "Unable to get the UAttributes version"
+        logger.debug(msg)
+        raise UStatusError.from_code_message(code=UCode.INVALID_ARGUMENT, message=msg)
+
+    # Check the version, decoding it only when it differs from the precomputed version bytes
+    version_bytes = bytes(attachment_bytes[0])
+    if version_bytes != _UATTRIBUTE_VERSION_BYTES:
+        version = int.from_bytes(version_bytes, byteorder='big')
+        if version != UATTRIBUTE_VERSION:
+            msg = f"UAttributes version is {version} (should be {UATTRIBUTE_VERSION})"
+            logger.debug(msg)
+            raise UStatusError.from_code_message(code=UCode.INVALID_ARGUMENT, message=msg)
+
+    # Get the attributes from the remaining bytes
+    uattributes_data = bytes(attachment_bytes[1]) if len(attachment_bytes) > 1 else b""
+    if not uattributes_data:
+        msg = "Unable to get the UAttributes"
+        logger.debug(msg)
+        raise UStatusError.from_code_message(code=UCode.INVALID_ARGUMENT, message=msg)
+
+    # Parse the UAttributes from the bytes
+    try:
+        uattributes.ParseFromString(uattributes_data)
+    except DecodeError as e:
+        msg = f"Failed to convert Attachment to UAttributes: {e}"
+        logger.debug(msg)
+        raise UStatusError.from_code_message(code=UCode.INVALID_ARGUMENT, message=msg)
+
+    return uattributes
+
+
+def _uri_to_zenoh_key(authority_name: str, uri: UUri) -> str:
+    authority = authority_name if not uri.authority_name else uri.authority_name
+    return _uri_to_zenoh_key_cached(authority, uri.ue_id, uri.ue_version_major, uri.resource_id)
+
+
+def _src_only_key(authority_name: str, src_uri: UUri) -> str:
+    return "up/" + _uri_to_zenoh_key(authority_name, src_uri) + "/{}/{}/{}/{}"
+
+
+def _src_sink_key(authority_name: str, src_uri: UUri, sink_uri: UUri) -> str:
+    return "up/" + _uri_to_zenoh_key(authority_name, src_uri) + "/" + _uri_to_zenoh_key(authority_name, sink_uri)
+
+
 class ZenohUtils:
     @staticmethod
     def uri_to_zenoh_key(authority_name: str, uri: UUri) -> str:
-        authority = authority_name if not uri.authority_name else uri.authority_name
-        ue_id = "*" if uri.ue_id == UriFactory.WILDCARD_ENTITY_ID else f"{uri.ue_id:X}"
-        ue_version_major = (
-            "*" if uri.ue_version_major == UriFactory.WILDCARD_ENTITY_VERSION else f"{uri.ue_version_major:X}"
-        )
-        resource_id = "*" if uri.resource_id == UriFactory.WILDCARD_RESOURCE_ID else f"{uri.resource_id:X}"
-        return f"{authority}/{ue_id}/{ue_version_major}/{resource_id}"
+        return _uri_to_zenoh_key(authority_name, uri)
 
     @staticmethod
     def get_uauth_from_uuri(uri: UUri) -> Union[str, UStatus]:
         if uri.authority:
             try:
-                authority_bytes = uri.authority.SerializeToString()
-                # Iterate over each byte and formate it as a two digit hexa decimal
-                return "".join(f"{c:02x}" for c in authority_bytes)
+                # Format each byte as a two digit lowercase hexadecimal
+                return uri.authority.SerializeToString().hex()
             except Exception as e:
                 msg = f"Unable to transform UAuthority into micro form: {e}"
-                logging.debug(msg)
+                logger.debug(msg)
                 return UStatus(code=UCode.INVALID_ARGUMENT, message=msg)
         else:
             msg = "UAuthority is empty"
-            logging.debug(msg)
+            logger.debug(msg)
             return UStatus(code=UCode.INVALID_ARGUMENT, message=msg)
 
     @staticmethod
     def to_zenoh_key_string(authority_name: str, src_uri: UUri, dst_uri: UUri = None) -> str:
-        src = ZenohUtils.uri_to_zenoh_key(authority_name, src_uri)
-        dst = ZenohUtils.uri_to_zenoh_key(authority_name, dst_uri) if dst_uri and dst_uri != UUri() else "{}/{}/{}/{}"
-        return f"up/{src}/{dst}"
+        # An empty UUri serializes to zero bytes, which avoids building a UUri() to compare against
+        if dst_uri is not None and dst_uri.ByteSize() != 0:
+            return _src_sink_key(authority_name, src_uri, dst_uri)
+        return _src_only_key(authority_name, src_uri)
 
     @staticmethod
-    def map_zenoh_priority(upriority: UPriority) -> Priority:
-        mapping = {
-            UPriority.UPRIORITY_CS0: Priority.BACKGROUND,
-            UPriority.UPRIORITY_CS1: Priority.DATA_LOW,
-            UPriority.UPRIORITY_CS2: Priority.DATA,
-            UPriority.UPRIORITY_CS3: Priority.DATA_HIGH,
-            UPriority.UPRIORITY_CS4: Priority.INTERACTIVE_LOW,
-            UPriority.UPRIORITY_CS5: Priority.INTERACTIVE_HIGH,
-            UPriority.UPRIORITY_CS6: Priority.REAL_TIME,
-            UPriority.UPRIORITY_UNSPECIFIED: Priority.DATA_LOW,
-        }
-        return mapping[upriority]
+    def src_only_key(authority_name: str, src_uri: UUri) -> str:
+        return _src_only_key(authority_name, src_uri)
 
     @staticmethod
-    def uattributes_to_attachment(uattributes: UAttributes):
-        # Convert the version number to bytes (assuming 1 as in the Rust example)
-        version_bytes = UATTRIBUTE_VERSION.to_bytes(1, byteorder='little')
+    def src_sink_key(authority_name: str, src_uri: UUri, sink_uri: UUri) -> str:
+        return _src_sink_key(authority_name, src_uri, sink_uri)
 
-        # Serialize the UAttributes to bytes
-        uattributes_bytes = uattributes.SerializeToString()
-
-        # Combine version bytes and uattributes bytes into one list of bytes
-        attachment_bytes = [version_bytes, uattributes_bytes]
+    @staticmethod
+    def map_zenoh_priority(upriority: UPriority) -> Priority:
+        if 0 <= upriority < len(_PRIORITY_TABLE):
+            return _PRIORITY_TABLE[upriority]
+        return _PRIORITY_UNSPEC
 
-        # Convert the combined bytes to ZBytes
-        return attachment_bytes
+    @staticmethod
+    def uattributes_to_attachment(uattributes: UAttributes) -> List[bytes]:
+        # Keep the version byte and the serialized UAttributes as separate segments, as peers read them that way
+        return [_UATTRIBUTE_VERSION_BYTES, uattributes.SerializeToString()]
 
     @staticmethod
     def attachment_to_uattributes(attachment: ZBytes) -> UAttributes:
-        try:
-            # Convert ZBytes to a list of bytes
-            attachment_bytes = attachment.deserialize(list)
-
-            # Ensure there is at least one byte for the version
-            if len(attachment_bytes) < 1:
-                msg = "Unable to get the UAttributes version"
-                logging.debug(msg)
-                raise UStatusError.from_code_message(code=UCode.INVALID_ARGUMENT, message=msg)
-
-            # Check the version
-            version = int.from_bytes(bytes(attachment_bytes[0]), byteorder='big')
-            if version != UATTRIBUTE_VERSION:
-                msg = f"UAttributes version is {version} (should be {UATTRIBUTE_VERSION})"
-                logging.debug(msg)
-                raise UStatusError.from_code_message(code=UCode.INVALID_ARGUMENT, message=msg)
-
-            # Get the attributes from the remaining bytes
-            uattributes_data = bytes(attachment_bytes[1])
-            if not uattributes_data:
-                msg = "Unable to get the UAttributes"
-                logging.debug(msg)
-                raise UStatusError.from_code_message(code=UCode.INVALID_ARGUMENT, message=msg)
-
-            # Parse the UAttributes from the bytes
-            uattributes = UAttributes()
-            uattributes.ParseFromString(uattributes_data)
-
-            return uattributes
-
-        except Exception as e:
-            msg = f"Failed to convert Attachment to UAttributes: {str(e)}"
-            logging.debug(msg)
-            raise UStatusError.from_code_message(code=UCode.INVALID_ARGUMENT, message=msg)
+        return _parse_attachment(attachment, UAttributes())
+
+    @staticmethod
+    def attachment_to_uattributes_inplace(attachment: ZBytes) -> UAttributes:
+        """
+        Like attachment_to_uattributes, but parses into a UAttributes reused per thread instead of allocating one.
+
+        The returned UAttributes is only valid until the next call on the same thread, so copy it (e.g. into a
+        UMessage) before keeping it around.
+
+        :param attachment: The Zenoh attachment to decode.
+        :return: The thread-local UAttributes holding the decoded attributes.
+        """
+        uattributes = getattr(_TLS, "uattributes", None)
+        if uattributes is None:
+            uattributes = _TLS.uattributes = UAttributes()
+        return _parse_attachment(attachment, uattributes)
 
     @staticmethod
-    def get_listener_message_type(source_uuri: UUri, sink_uuri: UUri = None) -> Union[MessageFlag, UStatusError]:
+    def get_listener_message_type(source_uuri: UUri, sink_uuri: UUri = None) -> int:
         """
         The table for mapping resource ID to message type:
 
@@ -164,58 +288,40 @@ class ZenohUtils:
 
         :param source_uuri: The source UUri.
         :param sink_uuri: Optional sink UUri for request-response types.
-        :return: MessageFlag indicating the type of message.
+        :return: MessageFlag bits indicating the type of message.
         :raises Exception: If the combination of source UUri and sink UUri is invalid.
         """
-        flag = MessageFlag(0)
-
-        rpc_range = range(1, 0x7FFF)
-        nonrpc_range = range(0x8000, 0xFFFE)
-        wildcard_resource_id = UriFactory.WILDCARD_RESOURCE_ID
-
-        src_resource = source_uuri.resource_id
-
-        # Notification / Request / Response
-        if sink_uuri:
-            dst_resource = sink_uuri.resource_id
-
-            if (
-                (src_resource in nonrpc_range and dst_resource == 0)
-                or (src_resource in nonrpc_range and dst_resource == wildcard_resource_id)
-                or (src_resource == wildcard_resource_id and dst_resource == 0)
-                or (src_resource == wildcard_resource_id and dst_resource == wildcard_resource_id)
-            ):
-                flag |= MessageFlag.NOTIFICATION
-
-            if (
-                (src_resource == 0 and dst_resource in rpc_range)
-                or (src_resource == 0 and dst_resource == wildcard_resource_id)
-                or (src_resource == wildcard_resource_id and dst_resource in rpc_range)
-                or (src_resource == wildcard_resource_id and dst_resource == wildcard_resource_id)
-            ):
-                flag |= MessageFlag.REQUEST
-
-            if (
-                (src_resource in rpc_range and dst_resource == 0)
-                or (src_resource in rpc_range and dst_resource == wildcard_resource_id)
-                or (src_resource == wildcard_resource_id and dst_resource == 0)
-                or (src_resource == wildcard_resource_id and dst_resource == wildcard_resource_id)
-            ):
-                flag |= MessageFlag.RESPONSE
-
-            if dst_resource == wildcard_resource_id and (
-                src_resource in nonrpc_range or src_resource == wildcard_resource_id
-            ):
-                flag |= MessageFlag.PUBLISH
-
-        # Publish
-        elif src_resource in nonrpc_range or src_resource == wildcard_resource_id:
-            flag |= MessageFlag.PUBLISH
+        flag = _lookup_flag(source_uuri, sink_uuri)
 
         # Error handling
-        if flag == MessageFlag(0):
+        if not flag:
             raise UStatusError.from_code_message(
-                code=UCode.INTERNAL, message="Wrong combination of source UUri and sink " "UUri"
+                code=UCode.INTERNAL, message="Wrong combination of source UUri and sink UUri"
             )
         else:
             return flag
+
+    @staticmethod
+    def get_listener_message_types_batch(
+        source_uuris: Sequence[UUri], sink_uuris: Sequence[Optional[UUri]]
+    ) -> List[int]:
+        """
+        Batch version of get_listener_message_type, e.g. for restoring many listeners after a reconnect.
+
+        :param source_uuris: The source UUris.
+        :param sink_uuris: The sink UUris, paired by position with source_uuris (None where there is no sink).
+        :return: The MessageFlag bits of each source/sink pair, in order.
+        :raises UStatusError: If the lengths differ or any combination of source UUri and sink UUri is invalid.
+        """
+        if len(source_uuris) != len(sink_uuris):
+            raise UStatusError.from_code_message(
+                code=UCode.INVALID_ARGUMENT, message="Source and sink UUris must have the same length"
+            )
+
+        flags = [_lookup_flag(src, sink) for src, sink in zip(source_uuris, sink_uuris)]
+        if 0 in flags:
+            raise UStatusError.from_code_message(
+                code=UCode.INTERNAL,
+                message=f"Wrong combination of source UUri and sink UUri at index {flags.index(0)}",
+            )
+        return flags